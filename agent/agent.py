@@ -29,11 +29,11 @@ class Agent:
         Global.UNIT_SENSOR_RANGE = env_cfg["unit_sensor_range"]
 
         self.state = State(self.team_id)
-        self.previous_state = self.state.copy()
+        self.previous_state = self.state.snapshot()
 
     def act(self, step: int, obs, remaining_overage_time: int = 60):
         state = self.state
-        self.previous_state = state.copy()
+        self.previous_state = state.snapshot()
 
         state.update(obs)
 
@@ -46,7 +46,7 @@ class Agent:
         )
 
         if state.match_step == 0:
-            self.previous_state = state.copy()
+            self.previous_state = state.snapshot()
 
         find_hidden_constants(self.previous_state, state)
 
@@ -1,5 +1,6 @@
 import os
 import sys
+import functools
 import numpy as np
 
 IS_KAGGLE = os.path.exists("/kaggle_simulations")
@@ -64,18 +65,23 @@ class Global:
     # How many relics did we find in each match
     RELIC_RESULTS = [0 for _ in range(NUM_MATCHES_IN_GAME)]
 
-    # obstacles_movement_status: list of {True, False, None}
+    # obstacles_movement_status: int8 buffer of {1, 0, -1}
     # A history log of obstacle (asteroids and nebulae) movement events.
-    # - `True`: The ships' sensors detected a change in the obstacles' positions at this step.
-    # - `False`: The sensors did not detect any changes.
-    # - `None`: It is unknown whether there have been changes or not.
+    # - `1`: The ships' sensors detected a change in the obstacles' positions at this step.
+    # - `0`: The sensors did not detect any changes.
+    # - `-1`: It is unknown whether there have been changes or not.
+    # Only the first NUM_OBSTACLES_MOVEMENT_STATUS elements of the buffer are filled.
     # This information will be used to determine the speed of obstacle movement.
-    OBSTACLES_MOVEMENT_STATUS = []
+    OBSTACLES_MOVEMENT_STATUS = np.full(
+        (MAX_STEPS_IN_MATCH + 1) * NUM_MATCHES_IN_GAME, -1, dtype=np.int8
+    )
+    NUM_OBSTACLES_MOVEMENT_STATUS = 0
 
     # Game Params:
     class DefaultParams:
         IL = True
         HIDDEN_NODE_ENERGY = 0
+        FAST_SNAPSHOT = True  # State.snapshot returns a light copy of the state
 
     class GameOverParams(DefaultParams):
         IL = False
@@ -117,7 +123,10 @@ class Global:
 
         cls.REWARD_RESULTS = []
         cls.RELIC_RESULTS = [0 for _ in range(cls.NUM_MATCHES_IN_GAME)]
-        cls.OBSTACLES_MOVEMENT_STATUS = []
+        cls.OBSTACLES_MOVEMENT_STATUS = np.full(
+            (cls.MAX_STEPS_IN_MATCH + 1) * cls.NUM_MATCHES_IN_GAME, -1, dtype=np.int8
+        )
+        cls.NUM_OBSTACLES_MOVEMENT_STATUS = 0
 
         cls.Params = cls.DefaultParams
 
@@ -133,17 +142,54 @@ class Colors:
 SPACE_SIZE = Global.SPACE_SIZE
 SECTOR_SIZE = int((SPACE_SIZE**2 + SPACE_SIZE) / 2)  # 300
 
+# the border line and the row labels of the map displays
+GRID_LINE = " + " + " ".join([f"{x:>2}" for x in range(SPACE_SIZE)]) + "  +\n"
+GRID_LABELS = [f"{y:>2}" for y in range(SPACE_SIZE)]
 
-def log(*args, level=3):
+
+def colored_int(i):
+    color = Colors.green if i > 0 else Colors.red
+    return f"{color}{i:>3}{Colors.endc}"
+
+
+def log(*args, level=3, sep=" "):
     # 1 - Error
     # 2 - Info
     # 3 - Debug
     if level <= Global.VERBOSITY:
         file = sys.stderr
         if level == 1:
-            print(f"{Colors.red}Error{Colors.endc}:", *args, file=file)
+            print(f"{Colors.red}Error{Colors.endc}:", *args, sep=sep, file=file)
         else:
-            print(*args, file=file)
+            print(*args, sep=sep, file=file)
+
+
+def debug_only(func):
+    # the decorated function does nothing, unless debug messages are logged
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if Global.VERBOSITY >= 3:
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def add_obstacles_movement_status(status: bool | None):
+    i = Global.NUM_OBSTACLES_MOVEMENT_STATUS
+    if i >= len(Global.OBSTACLES_MOVEMENT_STATUS):
+        # one player can't fill the buffer, but two players sharing the Global can
+        log(
+            f"The obstacles movement log is full ({i} statuses), "
+            f"can't add the status {status}",
+            level=1,
+        )
+        return
+    Global.OBSTACLES_MOVEMENT_STATUS[i] = -1 if status is None else int(status)
+    Global.NUM_OBSTACLES_MOVEMENT_STATUS = i + 1
+
+
+def get_obstacles_movement_status() -> np.ndarray:
+    return Global.OBSTACLES_MOVEMENT_STATUS[: Global.NUM_OBSTACLES_MOVEMENT_STATUS]
 
 
 def get_match_step(step: int) -> int:
@@ -174,6 +220,12 @@ def get_opposite(x, y) -> tuple:
     return SPACE_SIZE - y - 1, SPACE_SIZE - x - 1
 
 
+# OPPOSITE_XY[y][x] - coordinates of the node opposite to (x, y)
+OPPOSITE_XY = [
+    [get_opposite(x, y) for x in range(SPACE_SIZE)] for y in range(SPACE_SIZE)
+]
+
+
 def is_inside(x, y) -> bool:
     return 0 <= x < SPACE_SIZE and 0 <= y < SPACE_SIZE
 
@@ -192,11 +244,31 @@ def nearby_positions(x, y, distance):
             yield _x, _y
 
 
+def nearby_slice(x, y, distance):
+    # the [y, x] index of the same square as nearby_positions
+    return (
+        slice(max(0, y - distance), max(0, min(SPACE_SIZE, y + distance + 1))),
+        slice(max(0, x - distance), max(0, min(SPACE_SIZE, x + distance + 1))),
+    )
+
+
+def sap_hits(sap_positions):
+    # returns the number of direct and adjacent sap hits, indexed as [y, x]
+    direct_hits = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.int16)
+    adjacent_hits = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.int16)
+    for x, y in sap_positions:
+        adjacent_hits[nearby_slice(x, y, 1)] += 1
+        if 0 <= x < SPACE_SIZE and 0 <= y < SPACE_SIZE:
+            adjacent_hits[y, x] -= 1
+            direct_hits[y, x] += 1
+    return direct_hits, adjacent_hits
+
+
 def cardinal_positions(x, y):
     for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):
         _x = x + dx
         _y = y + dy
-        if is_inside(_x, _y):
+        if 0 <= _x < SPACE_SIZE and 0 <= _y < SPACE_SIZE:
             yield _x, _y
 
 
@@ -249,6 +321,60 @@ def transpose(arr, reflective=False):
         raise ValueError(f"Can't transpose array with the shape {arr.shape}")
 
 
+def box_sum(arr, radius):
+    """
+    Returns the sum over the square (2 * radius + 1) x (2 * radius + 1) around each cell,
+    the cells outside the array are counted as zeros.
+    Same as convolve2d with a kernel of ones, but uses a summed-area table.
+    """
+    table = _summed_area_table(arr, radius)
+    return _window_sum(table, arr.shape, radius, radius)
+
+
+def pyramid_sum(arr, radius):
+    """
+    Same as box_sum, but the weight of a cell is radius + 1 - chebyshev distance,
+    i.e. the sum of box sums with radii from 0 to radius.
+    """
+    table = _summed_area_table(arr, radius)
+    out = _window_sum(table, arr.shape, radius, 0)
+    for r in range(1, radius + 1):
+        out += _window_sum(table, arr.shape, radius, r)
+    return out
+
+
+# (shape, padding, dtype) -> summed-area table buffer, reused between calls
+_summed_area_tables = {}
+
+
+def _summed_area_table(arr, padding):
+    h, w = arr.shape
+    dtype = np.dtype(np.int32 if arr.dtype == bool else arr.dtype)
+
+    key = h, w, padding, dtype
+    table = _summed_area_tables.get(key)
+    if table is None:
+        table = np.empty((h + 2 * padding + 1, w + 2 * padding + 1), dtype=dtype)
+        _summed_area_tables[key] = table
+
+    table.fill(0)
+    table[padding + 1 : padding + 1 + h, padding + 1 : padding + 1 + w] = arr
+    table.cumsum(axis=0, out=table)
+    table.cumsum(axis=1, out=table)
+    return table
+
+
+def _window_sum(table, shape, padding, radius):
+    h, w = shape
+    lo, hi = padding - radius, padding + radius + 1
+    return (
+        table[hi : hi + h, hi : hi + w]
+        - table[lo : lo + h, hi : hi + w]
+        - table[hi : hi + h, lo : lo + w]
+        + table[lo : lo + h, lo : lo + w]
+    )
+
+
 def get_nebula_tile_drift_speed():
     speed = 1 / Global.OBSTACLE_MOVEMENT_PERIOD
     if Global.OBSTACLE_MOVEMENT_DIRECTION[0] < 0:
@@ -265,10 +391,34 @@ def elements_moving(step, movement_period=None):
     return (step - 2) * speed % 1 > (step - 1) * speed % 1
 
 
+# movement period -> movement schedule, see get_movement_schedule
+_movement_schedules = {}
+
+
+def get_movement_schedule(movement_period, num_steps=None):
+    # schedule[step] == elements_moving(step, movement_period)
+    if num_steps is None:
+        num_steps = (Global.MAX_STEPS_IN_MATCH + 1) * Global.NUM_MATCHES_IN_GAME
+    schedule = _movement_schedules.get(movement_period)
+    if schedule is None or len(schedule) < num_steps:
+        size = max(
+            num_steps, (Global.MAX_STEPS_IN_MATCH + 1) * Global.NUM_MATCHES_IN_GAME
+        )
+        schedule = np.array(
+            [elements_moving(step, movement_period) for step in range(size)]
+        )
+        _movement_schedules[movement_period] = schedule
+    return schedule
+
+
+def elements_moving_at(step, movement_period):
+    return bool(get_movement_schedule(movement_period, step + 1)[step])
+
+
 def obstacles_moving(step):
     if not Global.OBSTACLE_MOVEMENT_PERIOD_FOUND:
         return
-    return elements_moving(step, movement_period=Global.OBSTACLE_MOVEMENT_PERIOD)
+    return elements_moving_at(step, Global.OBSTACLE_MOVEMENT_PERIOD)
 
 
 def can_relic_appear(global_step) -> bool:
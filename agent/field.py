@@ -1,11 +1,18 @@
 import numpy as np
 from functools import cached_property
-from collections import defaultdict
-
-from scipy.signal import convolve2d
 
 from .path import NodeType
-from .base import log, Global, SPACE_SIZE, Colors, nearby_positions
+from .base import (
+    log,
+    Global,
+    SPACE_SIZE,
+    GRID_LINE,
+    GRID_LABELS,
+    colored_int,
+    debug_only,
+    box_sum,
+    pyramid_sum,
+)
 
 
 class StaticField:
@@ -36,43 +43,32 @@ class Field:
 
         self.last_time_seen = self._get_last_time_seen_field(previous_field)
 
+        # (team_id, nebula_vision_reduction) -> fleet vision
+        self._fleet_vision = {}
+
     @property
     def space(self):
         return self._state.space
 
     def _create_space_fields(self):
-        asteroid_field = create_empty_field()
-        nebulae_field = create_empty_field()
-        energy_field = create_empty_field()
-        energy_field[:] = Global.HIDDEN_NODE_ENERGY
-        energy_gain_field = create_empty_field()
-        last_relic_check = create_empty_field()
-        last_step_in_vision = create_empty_field()
-        need_to_explore_for_relic = create_empty_field()
-        need_to_explore_for_relic[:] = 1
-        need_to_explore_for_reward = create_empty_field()
-        need_to_explore_for_reward[:] = 1
-        unknown_energy = create_empty_field()
-        unknown_nodes = create_empty_field()
-        for node in self.space:
-            x, y = node.coordinates
-            if node.type == NodeType.asteroid:
-                asteroid_field[y, x] = 1
-            elif node.type == NodeType.nebula:
-                nebulae_field[y, x] = 1
-            if node.energy is not None:
-                energy_field[y, x] = node.energy
-            energy_gain_field[y, x] = node.energy_gain
-            last_relic_check[y, x] = node.last_relic_check
-            last_step_in_vision[y, x] = node.last_step_in_vision
-            if node.explored_for_relic:
-                need_to_explore_for_relic[y, x] = 0
-            if node.explored_for_reward:
-                need_to_explore_for_reward[y, x] = 0
-            if node.energy is None:
-                unknown_energy[y, x] = 1
-            if node.is_unknown:
-                unknown_nodes[y, x] = 1
+        space = self.space
+        node_types = space.type_map
+        energy_known = space.energy_known_map
+
+        asteroid_field = (node_types == NodeType.asteroid).astype(np.float32)
+        nebulae_field = (node_types == NodeType.nebula).astype(np.float32)
+        energy_field = np.where(
+            energy_known, space.energy_map, Global.HIDDEN_NODE_ENERGY
+        ).astype(np.float32)
+        energy_gain_field = (
+            energy_field - nebulae_field * Global.NEBULA_ENERGY_REDUCTION
+        )
+        last_relic_check = space.last_relic_check_map.astype(np.float32)
+        last_step_in_vision = space.last_step_in_vision_map.astype(np.float32)
+        need_to_explore_for_relic = (~space.explored_for_relic_map).astype(np.float32)
+        need_to_explore_for_reward = (~space.explored_for_reward_map).astype(np.float32)
+        unknown_energy = (~energy_known).astype(np.float32)
+        unknown_nodes = (node_types == NodeType.unknown).astype(np.float32)
 
         return (
             asteroid_field,
@@ -89,11 +85,7 @@ class Field:
 
     @cached_property
     def vision(self):
-        field = create_empty_field()
-        for node in self.space:
-            if node.is_visible:
-                field[node.y, node.x] = 1
-        return field
+        return self.space.visible_map.astype(np.float32)
 
     @cached_property
     def sensor_power(self):
@@ -105,23 +97,13 @@ class Field:
 
     @staticmethod
     def _sensor_power(fleet):
-        r = Global.UNIT_SENSOR_RANGE * 2 + 1
-        sensor_kernel = np.zeros((r, r), dtype=np.float32)
-        for d in range(0, Global.UNIT_SENSOR_RANGE + 1):
-            sensor_kernel[d : r - d, d : r - d] = d + 1
-
         field = create_empty_field()
         for unit in fleet:
             x, y = unit.coordinates
             field[y, x] += 1
 
-        field = convolve2d(
-            field,
-            sensor_kernel,
-            mode="same",
-            boundary="fill",
-            fillvalue=0,
-        )
+        # the sensor power decreases by 1 with each step from the unit
+        field = pyramid_sum(field, Global.UNIT_SENSOR_RANGE)
 
         for unit in fleet:
             x, y = unit.coordinates
@@ -130,20 +112,29 @@ class Field:
         return field
 
     def fleet_vision(self, fleet, nebula_vision_reduction):
-        sensor_power = self._sensor_power(fleet)
-
-        vision = create_empty_field()
-        for node in self.space:
-            x, y = node.coordinates
-            sp = sensor_power[y, x]
-            if sp < 1:
-                continue
+        # the fleets of the state don't move during the step,
+        # so their vision is computed once and shared by all nn inputs
+        if fleet is not self._state.get_fleet(fleet.team_id):
+            return self._fleet_vision_field(
+                self._sensor_power(fleet), nebula_vision_reduction
+            )
+
+        key = fleet.team_id, nebula_vision_reduction
+        if key not in self._fleet_vision:
+            if fleet.team_id == self._state.team_id:
+                sensor_power = self.sensor_power
+            else:
+                sensor_power = self.opp_sensor_power
+            self._fleet_vision[key] = self._fleet_vision_field(
+                sensor_power, nebula_vision_reduction
+            )
 
-            reduction = 0 if node.type != NodeType.nebula else nebula_vision_reduction
-            is_visible = sp - reduction >= 1
-            if is_visible:
-                vision[y, x] = 1
+        return self._fleet_vision[key]
 
+    def _fleet_vision_field(self, sensor_power, nebula_vision_reduction):
+        vision = create_empty_field()
+        reduction = self.nebulae * nebula_vision_reduction
+        vision[(sensor_power >= 1) & (sensor_power - reduction >= 1)] = 1
         return vision
 
     @cached_property
@@ -154,29 +145,22 @@ class Field:
         num_opp_ships_with_rewards, opp_reward_nodes = prob_opp_on_rewards(self._state)
         if num_opp_ships_with_rewards and opp_reward_nodes:
             prob = num_opp_ships_with_rewards / len(opp_reward_nodes)
+
+            # the number of the reward nodes within the sensor range of each node
+            num_probs = box_sum(
+                create_nodes_field(opp_reward_nodes), Global.UNIT_SENSOR_RANGE
+            )
+            in_range = num_probs > 0
+
             if prob == 1:
-                for node in opp_reward_nodes:
-                    for x, y in nearby_positions(
-                        *node.coordinates, Global.UNIT_SENSOR_RANGE
-                    ):
-                        field[y, x] = 1
+                field[in_range] = 1
             else:
-                node_to_num_probs = defaultdict(int)
-                for node in opp_reward_nodes:
-                    for x, y in nearby_positions(
-                        *node.coordinates, Global.UNIT_SENSOR_RANGE
-                    ):
-                        node_to_num_probs[(x, y)] += 1
-
                 num_rewards_without_ships = (
                     len(opp_reward_nodes) - num_opp_ships_with_rewards
                 )
-                for (x, y), num_probs in node_to_num_probs.items():
-                    if num_probs > num_rewards_without_ships:
-                        field[y, x] = 1
-                    else:
-                        no_vision_prob = (1 - prob) ** num_probs
-                        field[y, x] = max(field[y, x], 1 - no_vision_prob)
+                no_vision_prob = (1 - prob) ** num_probs[in_range].astype(int)
+                field[in_range] = np.maximum(field[in_range], 1 - no_vision_prob)
+                field[in_range & (num_probs > num_rewards_without_ships)] = 1
 
         return field
 
@@ -221,15 +205,7 @@ class Field:
             x, y = unit.node.coordinates
             field[y, x] += 1
 
-        sap_kernel = np.ones((3, 3), dtype=np.float32)
-        field = convolve2d(
-            field,
-            sap_kernel,
-            mode="same",
-            boundary="fill",
-            fillvalue=0,
-        )
-        return field
+        return box_sum(field, 1)
 
     @property
     def control(self):
@@ -272,31 +248,17 @@ class Field:
     @cached_property
     def sap_mask(self):
         # returns positions that make sense to sap
-        sap_kernel = np.ones((5, 5), dtype=np.float32)
-
-        field = convolve2d(
-            self.opp_ships_potential_positions,
-            sap_kernel,
-            mode="same",
-            boundary="fill",
-            fillvalue=0,
-        )
+        field = box_sum(self.opp_ships_potential_positions, 2)
         field = field > 0
         return field
 
     @cached_property
     def reward(self):
-        field = create_empty_field()
-        for node in self.space.reward_nodes:
-            field[node.y, node.x] = 1
-        return field
+        return create_nodes_field(self.space.reward_nodes)
 
     @cached_property
     def relic(self):
-        field = create_empty_field()
-        for node in self.space.relic_nodes:
-            field[node.y, node.x] = 1
-        return field
+        return create_nodes_field(self.space.relic_nodes)
 
     def _get_last_time_seen_field(self, previous_field):
         if previous_field is None or self._state.match_step == 0:
@@ -317,25 +279,29 @@ def create_empty_field():
     return np.zeros((SPACE_SIZE, SPACE_SIZE), np.float32)
 
 
-def show_field(weights):
-    def add_color(i):
-        color = Colors.green if i > 0 else Colors.red
-        return f"{color}{i:>3}{Colors.endc}"
+def create_nodes_field(nodes):
+    field = create_empty_field()
+    if nodes:
+        x, y = np.array([node.coordinates for node in nodes]).T
+        field[y, x] = 1
+    return field
+
 
-    line = " + " + " ".join([f"{x:>2}" for x in range(Global.SPACE_SIZE)]) + "  +\n"
-    str_grid = line
+@debug_only
+def show_field(weights):
+    lines = [GRID_LINE]
     for y in range(Global.SPACE_SIZE):
 
         str_row = []
 
         for x in range(Global.SPACE_SIZE):
             v = int(weights[y, x])
-            str_row.append(add_color(v))
+            str_row.append(colored_int(v))
 
-        str_grid += "".join([f"{y:>2}", *str_row, f" {y:>2}", "\n"])
+        lines.append("".join([GRID_LABELS[y], *str_row, " ", GRID_LABELS[y], "\n"]))
 
-    str_grid += line
-    log(str_grid)
+    lines.append(GRID_LINE)
+    log(*lines, sep="")
 
 
 def prob_opp_on_rewards(state):
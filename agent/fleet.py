@@ -1,19 +1,19 @@
 import numpy as np
-from collections import defaultdict
 
 from .base import (
     log,
     Global,
     SPACE_SIZE,
     get_spawn_location,
-    nearby_positions,
+    nearby_slice,
+    sap_hits,
     obstacles_moving,
     cardinal_positions,
     manhattan_distance,
     chebyshev_distance,
 )
 from .path import Action, ActionType, apply_action, actions_to_path
-from .space import Node, Space, NodeType
+from .space import Node, Space, SpaceSnapshot, NodeType
 
 
 class Fleet:
@@ -23,7 +23,15 @@ class Fleet:
         self.reward: int = 0
         self.spawn_position = get_spawn_location(self.team_id)
 
-        self.ships = [Ship(unit_id) for unit_id in range(Global.MAX_UNITS)]
+        # next_actions[unit_id] - (type, dx, dy) of the first action in the ship queue,
+        # type = -1 if the queue is empty
+        self.next_actions = np.zeros((Global.MAX_UNITS, 3), dtype=int)
+        self.next_actions[:, 0] = -1
+
+        self.ships = [
+            Ship(unit_id, self.next_actions[unit_id])
+            for unit_id in range(Global.MAX_UNITS)
+        ]
 
         self.vision = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.int8)
 
@@ -35,6 +43,22 @@ class Fleet:
             if ship.is_visible:
                 yield ship
 
+    @property
+    def positions(self) -> np.ndarray:
+        # (x, y) coordinates of the visible ships, shape (num_ships, 2)
+        positions = [ship.coordinates for ship in self]
+        return np.array(positions, dtype=np.int16).reshape(-1, 2)
+
+    @property
+    def energies(self) -> np.ndarray:
+        # energy of the visible ships, in the same order as positions
+        return np.array([ship.energy for ship in self], dtype=np.int16)
+
+    def next_positions(self) -> np.ndarray:
+        # (x, y) coordinates of the visible ships after their next action
+        positions = [ship.next_position() for ship in self]
+        return np.array(positions, dtype=np.int16).reshape(-1, 2)
+
     def update(self, obs, space: Space):
         points = int(obs["team_points"][self.team_id])
         self.reward = max(0, points - self.points)
@@ -75,18 +99,24 @@ class Fleet:
         for ship in self.ships:
             ship.clear()
 
+    def clone(self, space: Space | SpaceSnapshot) -> "Fleet":
+        # the ships of the copy refer to the nodes of the given space
+        fleet = Fleet.__new__(Fleet)
+        fleet.team_id = self.team_id
+        fleet.points = self.points
+        fleet.reward = self.reward
+        fleet.spawn_position = self.spawn_position
+        fleet.next_actions = self.next_actions.copy()
+        fleet.ships = [
+            ship.clone(space, fleet.next_actions[ship.unit_id]) for ship in self.ships
+        ]
+        fleet.vision = self.vision.copy()
+        return fleet
+
     def expected_sensor_mask(self):
-        space_size = Global.SPACE_SIZE
-        sensor_range = Global.UNIT_SENSOR_RANGE
-        mask = np.zeros((space_size, space_size), dtype=np.int16)
+        mask = np.zeros((Global.SPACE_SIZE, Global.SPACE_SIZE), dtype=np.int16)
         for ship in self:
-            x, y = ship.coordinates
-            for _y in range(
-                max(0, y - sensor_range), min(space_size, y + sensor_range + 1)
-            ):
-                mask[_y][
-                    max(0, x - sensor_range) : min(space_size, x + sensor_range + 1)
-                ] = 1
+            mask[nearby_slice(*ship.coordinates, Global.UNIT_SENSOR_RANGE)] = 1
         return mask
 
     def update_vision(self):
@@ -100,13 +130,16 @@ class Fleet:
 
 
 class Ship:
-    def __init__(self, unit_id: int):
+    def __init__(self, unit_id: int, next_action: np.ndarray | None = None):
         self.unit_id = unit_id
         self.energy = 0
         self.node: Node | None = None
         self.steps_since_last_seen: int = 0
 
         self.task = None
+        self._next_action = next_action
+        if next_action is None:
+            self._next_action = np.array([-1, 0, 0])
         self.action_queue: list[Action] = []
 
         self.vision = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.int8)
@@ -123,6 +156,21 @@ class Ship:
     def coordinates(self):
         return self.node.coordinates if self.node else None
 
+    @property
+    def action_queue(self) -> list[Action]:
+        return self._action_queue
+
+    @action_queue.setter
+    def action_queue(self, action_queue: list[Action]):
+        # the queue must be replaced, not modified in place,
+        # to keep the next action of the fleet in sync
+        self._action_queue = action_queue
+        if action_queue:
+            action = action_queue[0]
+            self._next_action[:] = (action.type, action.dx, action.dy)
+        elif self._next_action[0] >= 0:
+            self._next_action[:] = (-1, 0, 0)
+
     def path(self):
         if not self.action_queue:
             return [self.coordinates]
@@ -135,6 +183,25 @@ class Ship:
         self.action_queue = []
         self.steps_since_last_seen = 0
 
+    def clone(
+        self, space: Space | SpaceSnapshot, next_action: np.ndarray | None = None
+    ) -> "Ship":
+        # next_action - the row of the fleet next actions, which the ship updates
+        ship = Ship.__new__(Ship)
+        ship.unit_id = self.unit_id
+        ship.energy = self.energy
+        ship.node = None
+        if self.node is not None:
+            ship.node = space.get_node(*self.node.coordinates)
+        ship.steps_since_last_seen = self.steps_since_last_seen
+        ship.task = self.task
+        ship._next_action = next_action
+        if next_action is None:
+            ship._next_action = self._next_action.copy()
+        ship._action_queue = list(self.action_queue)
+        ship.vision = self.vision.copy()
+        return ship
+
     def can_move(self) -> bool:
         return self.node is not None and self.energy >= Global.UNIT_MOVE_COST
 
@@ -155,10 +222,7 @@ class Ship:
         x, y = self.coordinates
         r = Global.UNIT_SENSOR_RANGE
 
-        self.vision[
-            max(0, y - r) : min(SPACE_SIZE, y + r + 1),
-            max(0, x - r) : min(SPACE_SIZE, x + r + 1),
-        ] = 1
+        self.vision[nearby_slice(x, y, r)] = 1
 
 
 def find_hidden_constants(previous_state, state):
@@ -233,11 +297,11 @@ def _find_nebula_energy_reduction(previous_state, state):
         return
 
     spawn_position = state.fleet.spawn_position
-    opp_void_positions = set()
+    opp_void_positions = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=bool)
     for ship in state.opp_fleet:
         if ship.energy > 0:
             for x, y in cardinal_positions(*ship.coordinates):
-                opp_void_positions.add((x, y))
+                opp_void_positions[y, x] = True
 
     check_previous_type = False
     if not Global.OBSTACLE_MOVEMENT_PERIOD_FOUND:
@@ -253,7 +317,7 @@ def _find_nebula_energy_reduction(previous_state, state):
         if node.energy is None:
             continue
 
-        if ship.coordinates == spawn_position or ship.coordinates in opp_void_positions:
+        if ship.coordinates == spawn_position or opp_void_positions[node.y, node.x]:
             continue
 
         move_cost = 0
@@ -268,7 +332,7 @@ def _find_nebula_energy_reduction(previous_state, state):
 
         if (
             check_previous_type
-            and previous_state.space.get_node(*node.coordinates).type != NodeType.nebula
+            and previous_state.space.get_node_type(*node.coordinates) != NodeType.nebula
         ):
             continue
 
@@ -333,14 +397,9 @@ def _find_ship_interaction_constants(previous_state, state):
         for x_, y_ in cardinal_positions(*node.coordinates):
             void_field[x_, y_] += previous_ship.energy - move_cost
 
-    direct_sap_hits = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.int16)
-    adjacent_sap_hits = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.int16)
-    for x, y in sap_coordinates:
-        for x_, y_ in nearby_positions(x, y, distance=1):
-            if x_ == x and y_ == y:
-                direct_sap_hits[x_, y_] += 1
-            else:
-                adjacent_sap_hits[x_, y_] += 1
+    direct_sap_hits, adjacent_sap_hits = sap_hits(sap_coordinates)
+    # the fields below are indexed as [x, y], like void_field
+    direct_sap_hits, adjacent_sap_hits = direct_sap_hits.T, adjacent_sap_hits.T
 
     additional_energy_loss = find_additional_energy_loss(previous_state, state)
 
@@ -416,7 +475,7 @@ def _find_unit_sap_dropoff_factor(
             if node != previous_opp_ship.node:
                 move_cost = Global.UNIT_MOVE_COST
 
-            if previous_state.space.get_node(*node.coordinates).type == NodeType.nebula:
+            if previous_state.space.get_node_type(*node.coordinates) == NodeType.nebula:
                 if not Global.NEBULA_ENERGY_REDUCTION_FOUND:
                     continue
                 move_cost += Global.NEBULA_ENERGY_REDUCTION
@@ -465,9 +524,10 @@ def _find_unit_energy_void_factor(
     adjacent_sap_hits,
     additional_energy_loss,
 ):
-    position_to_unit_count = defaultdict(int)
-    for opp_ship in state.opp_fleet:
-        position_to_unit_count[opp_ship.coordinates] += 1
+    # unit_count[x, y] - the number of visible opponent units at (x, y)
+    unit_count = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.int16)
+    x, y = state.opp_fleet.positions.T
+    np.add.at(unit_count, (x, y), 1)
 
     for previous_opp_ship, opp_ship in zip(
         previous_state.opp_fleet.ships, state.opp_fleet.ships
@@ -494,7 +554,7 @@ def _find_unit_energy_void_factor(
             )
 
             node_void_field = int(void_field[x, y])
-            node_unit_count = position_to_unit_count[(x, y)]
+            node_unit_count = int(unit_count[x, y])
 
             node = opp_ship.node
             if node.energy is None:
@@ -504,7 +564,7 @@ def _find_unit_energy_void_factor(
             if node != previous_opp_ship.node:
                 move_cost = Global.UNIT_MOVE_COST
 
-            if previous_state.space.get_node(*node.coordinates).type == NodeType.nebula:
+            if previous_state.space.get_node_type(*node.coordinates) == NodeType.nebula:
                 if not Global.NEBULA_ENERGY_REDUCTION_FOUND:
                     continue
                 move_cost += Global.NEBULA_ENERGY_REDUCTION
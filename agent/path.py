@@ -1,6 +1,6 @@
 from enum import IntEnum
 
-from .base import Global, is_inside
+from .base import Global, SPACE_SIZE
 from .space import Space, NodeType
 
 DIRECTIONS = [
@@ -141,6 +141,6 @@ def allowed_movements(x, y, space):
     actions = []
     for action in (ActionType.right, ActionType.left, ActionType.up, ActionType.down):
         _x, _y = apply_action(x, y, action)
-        if is_inside(_x, _y) and space.is_walkable(_x, _y):
+        if 0 <= _x < SPACE_SIZE and 0 <= _y < SPACE_SIZE and space.is_walkable(_x, _y):
             actions.append(action)
     return actions
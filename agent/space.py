@@ -1,21 +1,21 @@
 import numpy as np
-from copy import deepcopy
 from enum import IntEnum
-from scipy.signal import convolve2d
 
 from .base import (
     log,
     Global,
     SPACE_SIZE,
+    OPPOSITE_XY,
     get_opposite,
-    warp_point,
+    box_sum,
     nearby_positions,
     get_match_number,
     get_match_step,
-    elements_moving,
+    get_movement_schedule,
     can_relic_appear,
     obstacles_moving,
-    chebyshev_distance,
+    add_obstacles_movement_status,
+    get_obstacles_movement_status,
 )
 
 
@@ -33,72 +33,115 @@ class NodeType(IntEnum):
 
 
 class Node:
-    def __init__(self, x, y):
+    # The map data itself is stored in the Space arrays,
+    # the node gives access to its own cell.
+
+    def __init__(self, x, y, space: "Space"):
         self.x = x
         self.y = y
-        self.type = NodeType.unknown
-        self.energy = None
-        self.is_visible = False
-        self.last_relic_check = 0
-        self.last_step_in_vision = 0
-
-        self._relic = False
-        self._reward = False
-        self._explored_for_relic = False
-        self._explored_for_reward = True
+        self._id = y * SPACE_SIZE + x
+        self._space = space
 
     def __repr__(self):
         return f"Node({self.x}, {self.y}, {self.type})"
 
     def __hash__(self):
-        return self.coordinates.__hash__()
+        return self._id
 
     def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
+        return other is self or (isinstance(other, Node) and other._id == self._id)
 
     @property
-    def relic(self):
-        return self._relic
+    def type(self) -> NodeType:
+        return NodeType(int(self._space._type_arr[self.y, self.x]))
+
+    @type.setter
+    def type(self, node_type: NodeType):
+        self._space._type_arr[self.y, self.x] = node_type
 
     @property
-    def reward(self):
-        return self._reward
+    def energy(self) -> int | None:
+        if not self._space._energy_known[self.y, self.x]:
+            return None
+        return int(self._space._energy_arr[self.y, self.x])
+
+    @energy.setter
+    def energy(self, energy: int | None):
+        if energy is None:
+            self._space._energy_known[self.y, self.x] = False
+        else:
+            self._space._energy_arr[self.y, self.x] = energy
+            self._space._energy_known[self.y, self.x] = True
 
     @property
-    def explored_for_relic(self):
-        return self._explored_for_relic
+    def is_visible(self) -> bool:
+        return bool(self._space._visible[self.y, self.x])
+
+    @is_visible.setter
+    def is_visible(self, is_visible: bool):
+        self._space._visible[self.y, self.x] = is_visible
 
     @property
-    def explored_for_reward(self):
-        return self._explored_for_reward
+    def last_relic_check(self) -> int:
+        return int(self._space._last_relic_check[self.y, self.x])
+
+    @last_relic_check.setter
+    def last_relic_check(self, step: int):
+        self._space._last_relic_check[self.y, self.x] = step
+
+    @property
+    def last_step_in_vision(self) -> int:
+        return int(self._space._last_step_in_vision[self.y, self.x])
+
+    @last_step_in_vision.setter
+    def last_step_in_vision(self, step: int):
+        self._space._last_step_in_vision[self.y, self.x] = step
+
+    @property
+    def relic(self) -> bool:
+        return bool(self._space._relic[self.y, self.x])
+
+    @property
+    def reward(self) -> bool:
+        return bool(self._space._reward[self.y, self.x])
+
+    @property
+    def explored_for_relic(self) -> bool:
+        return bool(self._space._explored_for_relic[self.y, self.x])
+
+    @property
+    def explored_for_reward(self) -> bool:
+        return bool(self._space._explored_for_reward[self.y, self.x])
 
     def update_relic_status(self, status: None | bool):
-        if self._explored_for_relic and self._relic and not status:
+        space = self._space
+        if self.explored_for_relic and self.relic and not status:
             raise ValueError(
-                f"Can't change the relic status {self._relic}->{status} for {self}"
+                f"Can't change the relic status {self.relic}->{status} for {self}"
                 ", the tile has already been explored"
             )
 
         if status is None:
-            self._explored_for_relic = False
+            space._explored_for_relic[self.y, self.x] = False
             return
 
-        self._relic = status
-        self._explored_for_relic = True
+        space._relic[self.y, self.x] = status
+        space._explored_for_relic[self.y, self.x] = True
 
     def update_reward_status(self, status: None | bool):
-        if self._explored_for_reward and self._reward and not status:
+        space = self._space
+        if self.explored_for_reward and self.reward and not status:
             raise ValueError(
-                f"Can't change the reward status {self._reward}->{status} for {self}"
+                f"Can't change the reward status {self.reward}->{status} for {self}"
                 ", the tile has already been explored"
             )
 
         if status is None:
-            self._explored_for_reward = False
+            space._explored_for_reward[self.y, self.x] = False
             return
 
-        self._reward = status
-        self._explored_for_reward = True
+        space._reward[self.y, self.x] = status
+        space._explored_for_reward[self.y, self.x] = True
 
     @property
     def is_unknown(self) -> bool:
@@ -128,10 +171,31 @@ class Node:
 
 
 class Space:
+    # _opp_index[:, y, x] - [y, x] index of the node opposite to (x, y)
+    _opp_index = np.array(
+        [
+            [OPPOSITE_XY[y][x][::-1] for x in range(SPACE_SIZE)]
+            for y in range(SPACE_SIZE)
+        ]
+    ).transpose(2, 0, 1)
+
     def __init__(self):
+        # map arrays, indexed as [y, x]
+        shape = (SPACE_SIZE, SPACE_SIZE)
+        self._type_arr = np.full(shape, NodeType.unknown, dtype=np.int8)
+        self._energy_arr = np.zeros(shape, dtype=np.int16)
+        self._energy_known = np.zeros(shape, dtype=bool)
+        self._visible = np.zeros(shape, dtype=bool)
+        self._last_relic_check = np.zeros(shape, dtype=np.int16)
+        self._last_step_in_vision = np.zeros(shape, dtype=np.int16)
+        self._relic = np.zeros(shape, dtype=bool)
+        self._reward = np.zeros(shape, dtype=bool)
+        self._explored_for_relic = np.zeros(shape, dtype=bool)
+        self._explored_for_reward = np.ones(shape, dtype=bool)
+
         self._nodes: list[list[Node]] = []
         for y in range(SPACE_SIZE):
-            row = [Node(x, y) for x in range(SPACE_SIZE)]
+            row = [Node(x, y, self) for x in range(SPACE_SIZE)]
             self._nodes.append(row)
 
         self._relic_nodes: set[Node] = set()
@@ -151,10 +215,42 @@ class Space:
         return self._nodes[y][x].energy
 
     def get_node_type(self, x, y) -> NodeType:
-        return self._nodes[y][x].type
+        return NodeType(int(self._type_arr[y, x]))
+
+    def snapshot(self) -> "SpaceSnapshot":
+        return SpaceSnapshot(self)
+
+    def clone(self) -> "Space":
+        space = Space.__new__(Space)
+        space._type_arr = self._type_arr.copy()
+        space._energy_arr = self._energy_arr.copy()
+        space._energy_known = self._energy_known.copy()
+        space._visible = self._visible.copy()
+        space._last_relic_check = self._last_relic_check.copy()
+        space._last_step_in_vision = self._last_step_in_vision.copy()
+        space._relic = self._relic.copy()
+        space._reward = self._reward.copy()
+        space._explored_for_relic = self._explored_for_relic.copy()
+        space._explored_for_reward = self._explored_for_reward.copy()
+
+        # the nodes have no state of their own, they only refer to the arrays
+        space._nodes = [[Node(n.x, n.y, space) for n in row] for row in self._nodes]
+        space._relic_nodes = {space.get_node(n.x, n.y) for n in self._relic_nodes}
+        space._reward_nodes = {space.get_node(n.x, n.y) for n in self._reward_nodes}
+        return space
 
     def get_opposite_node(self, x, y) -> Node:
-        return self.get_node(*get_opposite(x, y))
+        opp_x, opp_y = OPPOSITE_XY[y][x]
+        return self._nodes[opp_y][opp_x]
+
+    def _mirror(self, arr):
+        # returns the array, in which each node has the value of its opposite node
+        return arr[tuple(self._opp_index)]
+
+    def _opposite(self, mask):
+        # returns the index of the nodes opposite to the mask nodes,
+        # in the same order as arr[mask]
+        return tuple(self._opp_index[:, mask])
 
     def update(
         self,
@@ -172,28 +268,26 @@ class Space:
         )
 
     def _update_map(self, global_step, obs):
-        sensor_mask = obs["sensor_mask"]
-        obs_energy = obs["map_features"]["energy"]
-        obs_tile_type = obs["map_features"]["tile_type"]
-
-        obstacles_shifted = False
-        energy_nodes_shifted = False
-        for node in self:
-            x, y = node.coordinates
-            is_visible = sensor_mask[x, y]
-            if not is_visible:
-                continue
-
-            if not node.is_unknown and node.type.value != obs_tile_type[x, y]:
-                obstacles_shifted = True
-
-            if node.energy is not None and node.energy != obs_energy[x, y]:
-                energy_nodes_shifted = True
+        # the observation arrays are indexed as [x, y]
+        sensor_mask = np.asarray(obs["sensor_mask"], dtype=bool).T
+        obs_energy = np.asarray(obs["map_features"]["energy"]).T
+        obs_tile_type = np.asarray(obs["map_features"]["tile_type"]).T
+
+        obstacles_shifted = bool(
+            np.any(
+                sensor_mask
+                & (self._type_arr != NodeType.unknown)
+                & (self._type_arr != obs_tile_type)
+            )
+        )
+        energy_nodes_shifted = bool(
+            np.any(sensor_mask & self._energy_known & (self._energy_arr != obs_energy))
+        )
 
         if not Global.OBSTACLE_MOVEMENT_PERIOD_FOUND:
             self.add_obs_to_obstacles_movement_status_log(obs, obstacles_shifted)
 
-            period = _get_obstacle_movement_period(Global.OBSTACLES_MOVEMENT_STATUS)
+            period = _get_obstacle_movement_period(get_obstacles_movement_status())
             if period is not None:
                 Global.OBSTACLE_MOVEMENT_PERIOD_FOUND = True
                 Global.OBSTACLE_MOVEMENT_PERIOD = period
@@ -216,40 +310,31 @@ class Space:
                 self.move(*Global.OBSTACLE_MOVEMENT_DIRECTION, inplace=True)
             else:
                 log("Can't find OBSTACLE_MOVEMENT_DIRECTION", level=1)
-                for node in self:
-                    node.type = NodeType.unknown
-
-        for node in self:
-            x, y = node.coordinates
-            is_visible = bool(sensor_mask[x, y])
-
-            node.is_visible = is_visible
-            if is_visible:
-                node.last_relic_check = global_step
-                self.get_opposite_node(x, y).last_relic_check = global_step
-                node.last_step_in_vision = global_step
+                self._type_arr[:] = NodeType.unknown
 
-            if is_visible and node.is_unknown:
-                node.type = NodeType(int(obs_tile_type[x, y]))
+        # the map is symmetrical, so we can also update
+        # the nodes on the other side of the map.
+        # The opposite nodes are updated first, so the observed values take precedence.
+        opp_sensor_mask = self._opposite(sensor_mask)
 
-                # we can also update the node type on the other side of the map
-                # because the map is symmetrical
-                self.get_opposite_node(x, y).type = node.type
+        self._visible[:] = sensor_mask
+        self._last_relic_check[sensor_mask] = global_step
+        self._last_relic_check[opp_sensor_mask] = global_step
+        self._last_step_in_vision[sensor_mask] = global_step
 
-            if is_visible:
-                node.energy = int(obs_energy[x, y])
-
-                # the energy field should be symmetrical
-                self.get_opposite_node(x, y).energy = node.energy
+        new_types = sensor_mask & (self._type_arr == NodeType.unknown)
+        self._type_arr[self._opposite(new_types)] = obs_tile_type[new_types]
+        self._type_arr[new_types] = obs_tile_type[new_types]
 
         if energy_nodes_shifted:
             # The energy field has changed
             # I cannot predict what the new energy field will be like.
-            for node in self:
-                opp_node = self.get_opposite_node(*node.coordinates)
-                if not node.is_visible and not opp_node.is_visible:
-                    node.energy = None
-                    opp_node.energy = None
+            self._energy_known[:] = False
+
+        self._energy_arr[opp_sensor_mask] = obs_energy[sensor_mask]
+        self._energy_arr[sensor_mask] = obs_energy[sensor_mask]
+        self._energy_known[opp_sensor_mask] = True
+        self._energy_known[sensor_mask] = True
 
     def _update_relic_map(
         self, global_step, obs, team_id, team_reward, opp_team_id, opp_team_reward
@@ -274,24 +359,21 @@ class Space:
                 for reward_result in Global.REWARD_RESULTS:
                     reward_result["trust"] = False
 
-        all_rewards_found = True
-
         possible_relic_spawn = can_relic_appear(global_step)
 
-        for node in self:
-            if node.is_visible and not node.explored_for_relic:
-                self._update_relic_status(*node.coordinates, status=False)
-
-            if possible_relic_spawn:
-                opp_node = self.get_opposite_node(*node.coordinates)
-                if not node.is_visible and not opp_node.is_visible:
-                    if not node.relic and node.explored_for_relic:
-                        self._update_relic_status(*node.coordinates, status=None)
+        # the visible nodes have been explored, there are no new relics there
+        self._update_relic_status_by_mask(
+            self._visible & ~self._explored_for_relic, status=False
+        )
 
-            if not node.explored_for_reward:
-                all_rewards_found = False
+        if possible_relic_spawn:
+            # a new relic can appear in a node that is out of vision on both sides
+            out_of_vision = ~self._visible & ~self._mirror(self._visible)
+            self._update_relic_status_by_mask(
+                out_of_vision & ~self._relic & self._explored_for_relic, status=None
+            )
 
-        Global.ALL_REWARDS_FOUND = all_rewards_found
+        Global.ALL_REWARDS_FOUND = bool(self._explored_for_reward.all())
 
         num_relics_found = sum(Global.RELIC_RESULTS)
         # the maximum number of relics (without duplicates) we can find at this stage
@@ -303,16 +385,12 @@ class Space:
                 Global.ALL_RELICS_FOUND = True
 
             if match_number >= 2:
-                if num_relics_found >= 1 and all(
-                    node.explored_for_relic for node in self
-                ):
+                if num_relics_found >= 1 and self._explored_for_relic.all():
                     log(f"Found all relics: {Global.RELIC_RESULTS}", level=2)
                     Global.ALL_RELICS_FOUND = True
 
         if num_relics_found >= num_relics_th or Global.ALL_RELICS_FOUND:
-            for node in self:
-                if not node.explored_for_relic:
-                    self._update_relic_status(*node.coordinates, status=False)
+            self._update_relic_status_by_mask(~self._explored_for_relic, status=False)
 
         if not Global.ALL_REWARDS_FOUND:
             self._update_reward_results(obs, team_id, team_reward, full_visibility=True)
@@ -321,44 +399,29 @@ class Space:
 
     def add_obs_to_obstacles_movement_status_log(self, obs, obstacles_shifted):
         if obstacles_shifted:
-            Global.OBSTACLES_MOVEMENT_STATUS.append(True)
+            add_obstacles_movement_status(True)
             return
 
-        con_detect_obstacles_movements = False
-
-        sensor_mask = obs["sensor_mask"]
-        obstacles = [NodeType.nebula, NodeType.asteroid]
-
-        for node in self:
-            x, y = node.coordinates
-            if (
-                not sensor_mask[x, y]
-                or not node.is_visible
-                or node.type not in obstacles
-            ):
-                continue
-
-            for dx, dy in [(1, -1), (-1, 1)]:
-                x_, y_ = warp_point(x + dx, y + dy)
-                next_node = self.get_node(x_, y_)
-                if (
-                    not sensor_mask[x_, y_]
-                    or not next_node.is_visible
-                    or next_node.type == node.type
-                ):
-                    continue
+        # We can detect obstacles movements if we see an obstacle, and its neighbor
+        # in the direction of movement has a different type.
+        # Both nodes must be visible in the current and the previous steps.
+        sensor_mask = np.asarray(obs["sensor_mask"], dtype=bool).T
+        seen = sensor_mask & self._visible
+        obstacles = seen & np.isin(self._type_arr, (NodeType.nebula, NodeType.asteroid))
 
+        con_detect_obstacles_movements = False
+        for dx, dy in [(1, -1), (-1, 1)]:
+            # next_*[y, x] refers to the node (x + dx, y + dy)
+            next_seen = np.roll(seen, shift=(-dy, -dx), axis=(0, 1))
+            next_type = np.roll(self._type_arr, shift=(-dy, -dx), axis=(0, 1))
+            if np.any(obstacles & next_seen & (next_type != self._type_arr)):
                 con_detect_obstacles_movements = True
-                # log(f"can detect obstacles movements with nodes {node} {next_node}")
-                break
-
-            if con_detect_obstacles_movements:
                 break
 
         if con_detect_obstacles_movements:
-            Global.OBSTACLES_MOVEMENT_STATUS.append(False)
+            add_obstacles_movement_status(False)
         else:
-            Global.OBSTACLES_MOVEMENT_STATUS.append(None)
+            add_obstacles_movement_status(None)
 
     def move_obstacles(self, global_step):
         if (
@@ -374,25 +437,19 @@ class Space:
         # Therefore, if there are no relics near the node
         # we can infer that the node does not contain a reward.
 
-        relic_map = np.zeros((SPACE_SIZE, SPACE_SIZE), np.int32)
-        for node in self:
-            if node.relic or not node.explored_for_relic:
-                relic_map[node.y][node.x] = 1
+        relic_map = self._relic | ~self._explored_for_relic
 
-        reward_size = 2 * Global.RELIC_REWARD_RANGE + 1
+        # no relics in range RELIC_REWARD_RANGE
+        no_relics = box_sum(relic_map, Global.RELIC_REWARD_RANGE) == 0
 
-        reward_map = convolve2d(
-            relic_map,
-            np.ones((reward_size, reward_size), dtype=np.int32),
-            mode="same",
-            boundary="fill",
-            fillvalue=0,
-        )
+        conflicts = np.argwhere(no_relics & self._explored_for_reward & self._reward)
+        if len(conflicts):
+            y, x = conflicts[0]
+            # raises ValueError, a known reward can't be removed
+            self.get_node(int(x), int(y)).update_reward_status(False)
 
-        for node in self:
-            if reward_map[node.y][node.x] == 0:
-                # no relics in range RELIC_REWARD_RANGE
-                node.update_reward_status(False)
+        self._reward[no_relics] = False
+        self._explored_for_reward[no_relics] = True
 
     def _update_reward_results(self, obs, team_id, team_reward, full_visibility=True):
         ship_nodes = set()
@@ -511,6 +568,25 @@ class Space:
             self._relic_nodes.add(node)
             self._relic_nodes.add(opp_node)
 
+    def _update_relic_status_by_mask(self, mask, status: None | bool):
+        # same as _update_relic_status for every node of the mask,
+        # but status can only be False or None, so the relic nodes stay the same
+        assert not status
+
+        mask = mask | self._mirror(mask)
+
+        conflicts = np.argwhere(mask & self._explored_for_relic & self._relic)
+        if len(conflicts):
+            y, x = conflicts[0]
+            # raises ValueError, a known relic can't be removed
+            self.get_node(int(x), int(y)).update_relic_status(status)
+
+        if status is None:
+            self._explored_for_relic[mask] = False
+        else:
+            self._relic[mask] = status
+            self._explored_for_relic[mask] = True
+
     def _update_reward_status(self, x, y, status):
         node = self.get_node(x, y)
         node.update_reward_status(status)
@@ -534,36 +610,73 @@ class Space:
     def reward_nodes(self) -> set[Node]:
         return self._reward_nodes
 
+    # the map arrays are indexed as [y, x] and must not be modified outside the space
+
+    @property
+    def type_map(self) -> np.ndarray:
+        return self._type_arr
+
+    @property
+    def energy_map(self) -> np.ndarray:
+        return self._energy_arr
+
+    @property
+    def energy_known_map(self) -> np.ndarray:
+        return self._energy_known
+
+    @property
+    def visible_map(self) -> np.ndarray:
+        return self._visible
+
+    @property
+    def last_relic_check_map(self) -> np.ndarray:
+        return self._last_relic_check
+
+    @property
+    def last_step_in_vision_map(self) -> np.ndarray:
+        return self._last_step_in_vision
+
+    @property
+    def relic_map(self) -> np.ndarray:
+        return self._relic
+
+    @property
+    def reward_map(self) -> np.ndarray:
+        return self._reward
+
+    @property
+    def explored_for_relic_map(self) -> np.ndarray:
+        return self._explored_for_relic
+
+    @property
+    def explored_for_reward_map(self) -> np.ndarray:
+        return self._explored_for_reward
+
     def clear(self, global_step):
-        for node in self:
-            node.is_visible = False
-            node.last_step_in_vision = global_step
+        self._visible[:] = False
+        self._last_step_in_vision[:] = global_step
 
     def update_nodes_by_expected_sensor_mask(self, expected_sensor_mask):
-        for y in range(SPACE_SIZE):
-            for x in range(SPACE_SIZE):
-                if expected_sensor_mask[y][x] == 1 and self.get_node(x, y).is_unknown:
-                    # Only nebulae can block vision.
-                    self.get_node(x, y).type = NodeType.nebula
+        # Only nebulae can block vision.
+        nebulae = (expected_sensor_mask == 1) & (self._type_arr == NodeType.unknown)
+
+        # Nebulae are symmetrical
+        nebulae |= self._mirror(nebulae)
 
-                    # Nebulae are symmetrical
-                    self.get_opposite_node(x, y).type = NodeType.nebula
+        self._type_arr[nebulae] = NodeType.nebula
 
     def is_walkable(self, x, y):
-        return self.get_node(x, y).is_walkable
+        return bool(self._type_arr[y, x] != NodeType.asteroid)
 
     def move(self, dx: int, dy: int, *, inplace=False) -> "Space":
+        # Without inplace, returns a copy of the space with the moved obstacles.
+        moved_types = _move_types(self._type_arr, dx, dy)
         if not inplace:
-            new_space = deepcopy(self)
-            for node in self:
-                x, y = warp_point(node.x + dx, node.y + dy)
-                new_space.get_node(x, y).type = node.type
+            new_space = self.clone()
+            new_space._type_arr[:] = moved_types
             return new_space
         else:
-            types = [n.type for n in self]
-            for node, node_type in zip(self, types):
-                x, y = warp_point(node.x + dx, node.y + dy)
-                self.get_node(x, y).type = node_type
+            self._type_arr[:] = moved_types
             return self
 
     def clear_exploration_info(self, global_step):
@@ -573,9 +686,7 @@ class Space:
         if not Global.ALL_RELICS_FOUND:
             match_number = get_match_number(global_step)
             if match_number <= Global.LAST_MATCH_WHEN_RELIC_CAN_APPEAR:
-                for node in self:
-                    if not node.relic:
-                        self._update_relic_status(node.x, node.y, status=None)
+                self._update_relic_status_by_mask(~self._relic, status=None)
 
     def _filter_reward_results(self, step):
 
@@ -599,16 +710,14 @@ class Space:
             found_all_relics = num_relics_found >= num_relics_th
 
             if found_all_relics:
-                nodes = []
-                for node in reward_result["nodes"]:
-                    if any(
-                        chebyshev_distance(node.coordinates, relic_node.coordinates)
-                        <= Global.RELIC_REWARD_RANGE
-                        for relic_node in reward_result["known_relics"]
-                    ):
-                        nodes.append(node)
+                nodes = reward_result["nodes"]
+                within_relic_range = _within_range(
+                    nodes, reward_result["known_relics"], Global.RELIC_REWARD_RANGE
+                )
 
-                reward_result["nodes"] = nodes
+                reward_result["nodes"] = [
+                    node for node, ok in zip(nodes, within_relic_range) if ok
+                ]
                 reward_result["trust"] = True
             else:
 
@@ -668,24 +777,36 @@ class Space:
                     reward_result["trust"] = True
 
 
+def _within_range(nodes, targets, distance) -> np.ndarray:
+    # for each node, whether at least one target is within the chebyshev distance
+    if not nodes or not targets:
+        return np.zeros(len(nodes), dtype=bool)
+
+    node_xy = np.array([node.coordinates for node in nodes])
+    target_xy = np.array([target.coordinates for target in targets])
+
+    d = np.abs(node_xy[:, np.newaxis, :] - target_xy[np.newaxis, :, :]).max(axis=2)
+    return (d <= distance).any(axis=1)
+
+
+def _move_types(types, dx, dy):
+    # the node (x, y) moves to (x + dx, y + dy), the map wraps around
+    return np.roll(types, shift=(dy, dx), axis=(0, 1))
+
+
 def _get_obstacle_movement_direction(space, obs):
-    sensor_mask = obs["sensor_mask"]
-    obs_tile_type = obs["map_features"]["tile_type"]
+    sensor_mask = np.asarray(obs["sensor_mask"], dtype=bool).T
+    obs_tile_type = np.asarray(obs["map_features"]["tile_type"]).T
 
     suitable_directions = []
     for direction in [(1, -1), (-1, 1)]:
-        moved_space = space.move(*direction, inplace=False)
-
-        match = True
-        for node in moved_space:
-            x, y = node.coordinates
-            if (
-                sensor_mask[x, y]
-                and not node.is_unknown
-                and obs_tile_type[x, y] != node.type.value
-            ):
-                match = False
-                break
+        moved_types = _move_types(space._type_arr, *direction)
+
+        match = not np.any(
+            sensor_mask
+            & (moved_types != NodeType.unknown)
+            & (moved_types != obs_tile_type)
+        )
 
         if match:
             suitable_directions.append(direction)
@@ -694,45 +815,47 @@ def _get_obstacle_movement_direction(space, obs):
         return suitable_directions[0]
 
 
+def _get_obstacle_moving_pattern(period, num_steps):
+    # pattern[i] - whether the obstacles move at the i-th step of the status log
+    pattern = get_movement_schedule(period, num_steps + 1)[1 : num_steps + 1].copy()
+    pattern[0] = False
+    return pattern
+
+
+def _format_movement_status(obstacles_movement_status):
+    # the status log as it was logged before: None, False or True for each step
+    return [None if s < 0 else bool(s) for s in obstacles_movement_status]
+
+
 def _get_obstacle_movement_period(obstacles_movement_status):
 
     if len(obstacles_movement_status) < 5:
         return
 
+    num_steps = len(obstacles_movement_status)
+    obs_movements = obstacles_movement_status == 1
+    obs_no_movements = obstacles_movement_status == 0
+    obs_num_movements = int(obs_movements.sum())
+
     suitable_periods = []
     for period in Global.OBSTACLE_MOVEMENT_PERIOD_OPTIONS:
+        moving_pattern = _get_obstacle_moving_pattern(period, num_steps)
 
-        moving_pattern = [
-            elements_moving(x + 1, period)
-            for x in range(len(obstacles_movement_status))
-        ]
-        moving_pattern[0] = False
-
-        is_suitable = True
-        obs_num_movements = 0
-        pattern_num_movements = 0
-        for pattern_flag, obs_flag in zip(moving_pattern, obstacles_movement_status):
-            if pattern_flag is True and obs_flag is False:
-                is_suitable = False
-                break
-
-            if obs_flag:
-                obs_num_movements += 1
-            if pattern_flag:
-                pattern_num_movements += 1
+        if np.any(moving_pattern & obs_no_movements):
+            continue
 
-        if obs_num_movements > pattern_num_movements:
-            is_suitable = False
+        if obs_num_movements > int(moving_pattern.sum()):
+            continue
 
-        if is_suitable:
-            suitable_periods.append(period)
+        suitable_periods.append(period)
 
     Global.OBSTACLE_MOVEMENT_PERIOD_OPTIONS = suitable_periods
 
     if not suitable_periods:
         log(
             f"Can't find an obstacle movement period, "
-            f"which would fits to the observation {obstacles_movement_status}",
+            f"which would fits to the observation "
+            f"{_format_movement_status(obstacles_movement_status)}",
             level=1,
         )
         return
@@ -740,11 +863,36 @@ def _get_obstacle_movement_period(obstacles_movement_status):
     if len(suitable_periods) == 1:
         log(
             f"There is only one obstacle movement period ({suitable_periods[0]}), "
-            f"that fit the observation: {obstacles_movement_status}"
+            f"that fit the observation: "
+            f"{_format_movement_status(obstacles_movement_status)}"
         )
         return suitable_periods[0]
     else:
         log(
             f"There are {len(suitable_periods)} obstacle movement periods ({suitable_periods}), "
-            f"that fit the observation: {obstacles_movement_status}"
+            f"that fit the observation: "
+            f"{_format_movement_status(obstacles_movement_status)}"
+        )
+
+
+class SpaceSnapshot:
+    # the part of the space that is read from the previous state - the node types.
+    # Its nodes only give the coordinates and the type,
+    # reading any other node data raises AttributeError.
+
+    def __init__(self, space: Space):
+        self._type_arr = space._type_arr.copy()
+
+    def get_node(self, x, y) -> Node:
+        return Node(x, y, self)
+
+    def get_node_type(self, x, y) -> NodeType:
+        return NodeType(int(self._type_arr[y, x]))
+
+    def __getattr__(self, name):
+        # anything else would have to come from the live space,
+        # so it would return the current values instead of the previous ones
+        raise AttributeError(
+            f"SpaceSnapshot only provides the node types, '{name}' is not available. "
+            f"Use State.copy() to get the full previous space."
         )
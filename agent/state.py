@@ -1,16 +1,18 @@
-from copy import deepcopy
-
 import numpy as np
-from collections import defaultdict
 
 from .base import (
     log,
     Global,
     Colors,
+    GRID_LINE,
+    GRID_LABELS,
+    colored_int,
+    debug_only,
     set_game_prams,
+    add_obstacles_movement_status,
     elements_moving,
+    elements_moving_at,
     get_spawn_location,
-    chebyshev_distance,
     obstacles_moving,
 )
 from .path import ActionType
@@ -53,7 +55,7 @@ class State:
             self._update_game_params()
             self.field = Field(self)
             if self.match_number > 0 and not Global.OBSTACLE_MOVEMENT_PERIOD_FOUND:
-                Global.OBSTACLES_MOVEMENT_STATUS.append(None)
+                add_obstacles_movement_status(None)
             return
 
         points = int(obs["team_points"][self.team_id])
@@ -116,18 +118,49 @@ class State:
         return self.fleet if team_id == self.team_id else self.opp_fleet
 
     def copy(self) -> "State":
-        copy_state = State(self.team_id)
+        copy_state = State.__new__(State)
+        copy_state.team_id = self.team_id
+        copy_state.opp_team_id = self.opp_team_id
 
         copy_state.global_step = 0
         copy_state.match_step = 0
         copy_state.match_number = 0
 
-        copy_state.space = deepcopy(self.space)
-        copy_state.fleet = deepcopy(self.fleet)
-        copy_state.opp_fleet = deepcopy(self.opp_fleet)
+        # ships refer to the space nodes, so they get the nodes of the new space
+        copy_state.space = self.space.clone()
+        copy_state.fleet = self.fleet.clone(copy_state.space)
+        copy_state.opp_fleet = self.opp_fleet.clone(copy_state.space)
+
+        copy_state.grid = None
+        copy_state.field = None
 
         return copy_state
 
+    def snapshot(self) -> "State":
+        # a light copy of the state, which is used as the previous state:
+        # it contains the fleets and the node types, but not the full space.
+        # Only the ship coordinates, energies, action queues and the node types
+        # may be read from it. The ships refer to the nodes of the snapshot space,
+        # so reading any other node data raises AttributeError.
+        if not Global.Params.FAST_SNAPSHOT:
+            return self.copy()
+
+        snapshot_state = State.__new__(State)
+        snapshot_state.team_id = self.team_id
+        snapshot_state.opp_team_id = self.opp_team_id
+        snapshot_state.global_step = self.global_step
+        snapshot_state.match_step = self.match_step
+        snapshot_state.match_number = self.match_number
+
+        snapshot_state.space = self.space.snapshot()
+        snapshot_state.fleet = self.fleet.clone(snapshot_state.space)
+        snapshot_state.opp_fleet = self.opp_fleet.clone(snapshot_state.space)
+
+        snapshot_state.grid = None
+        snapshot_state.field = None
+
+        return snapshot_state
+
     def num_steps_before_obstacle_movement(self):
         if not Global.OBSTACLE_MOVEMENT_PERIOD_FOUND:
             return
@@ -158,36 +191,28 @@ class State:
         if spawn_pointer:
             actions[:] = (ActionType.sap, *spawn_pointer)
 
-        for i, ship in enumerate(ships):
-            if ship.node is not None:
-                actions[i][0] = ActionType.center
+        has_node = np.array([ship.node is not None for ship in ships], dtype=bool)
+        actions[has_node, 0] = ActionType.center
 
-            if ship.action_queue:
-                a = ship.action_queue[0]
-                actions[i] = (a.type.value, a.dx, a.dy)
+        next_actions = self.fleet.next_actions
+        queued = next_actions[:, 0] >= 0
+        actions[queued] = next_actions[queued]
 
         return actions
 
     def _get_spawn_pointer(self):
         spawn_location = get_spawn_location(self.team_id)
-        target = None
-        min_distance = 0
-        for ship in self.fleet:
-            next_position = ship.next_position()
-
-            if next_position == spawn_location:
-                continue
-
-            distance = chebyshev_distance(spawn_location, next_position)
-            if distance > Global.UNIT_SAP_RANGE:
-                continue
 
-            if target is None or min_distance > distance:
-                min_distance = distance
-                target = next_position
+        delta = self.fleet.next_positions() - spawn_location
+        distance = np.abs(delta).max(axis=1)
 
-        if target:
-            return target[0] - spawn_location[0], target[1] - spawn_location[1]
+        # the closest ship in sap range, which is not at the spawn location
+        candidates = np.flatnonzero(
+            (distance > 0) & (distance <= Global.UNIT_SAP_RANGE)
+        )
+        if len(candidates):
+            i = candidates[np.argmin(distance[candidates])]
+            return int(delta[i, 0]), int(delta[i, 1])
 
     def show_visible_map(self):
         log("Visible map:")
@@ -209,6 +234,7 @@ class State:
         log("Exploration map:")
         show_exploration_map(self.space)
 
+    @debug_only
     def show_tasks(self, show_path=False):
         log("Tasks:")
         for ship in self.fleet:
@@ -291,7 +317,7 @@ class State:
             return True
 
         if any(
-            elements_moving(self.global_step, p)
+            elements_moving_at(self.global_step, p)
             for p in Global.OBSTACLE_MOVEMENT_PERIOD_OPTIONS
         ):
             return True
@@ -299,114 +325,133 @@ class State:
         return False
 
 
+@debug_only
 def show_map(space, my_fleet=None, opp_fleet=None, only_visible=True):
-    ship_signs = (
-        [" "] + [str(x) for x in range(1, 10)] + ["A", "B", "C", "D", "E", "F", "H"]
-    )
+    codes = _get_map_codes(space, only_visible) + 1
+    codes = codes * _NUM_SHIP_CODES + _get_ship_codes(my_fleet, opp_fleet)
 
-    my_ships = defaultdict(int)
-    if my_fleet:
-        for ship in my_fleet:
-            my_ships[ship.node.coordinates] += 1
+    lines = [GRID_LINE]
+    for y, row in enumerate(codes.tolist()):
+        str_row = [_CELL_GLYPHS[code] for code in row]
+        lines.append(" ".join([GRID_LABELS[y], *str_row, GRID_LABELS[y], "\n"]))
 
-    opp_ships = defaultdict(int)
-    if opp_fleet:
-        for ship in opp_fleet:
-            opp_ships[ship.node.coordinates] += 1
+    lines.append(GRID_LINE)
+    log(*lines, sep="")
 
-    line = " + " + " ".join([f"{x:>2}" for x in range(Global.SPACE_SIZE)]) + "  +\n"
-    str_grid = line
-    for y in range(Global.SPACE_SIZE):
 
-        str_row = []
+def _create_map_glyphs():
+    # the index is the code from _get_map_codes: 4 * node type + 2 * relic + reward
+    glyphs = []
+    for node_glyphs in (" ~", "nñ", "aã"):
+        for s1 in node_glyphs:
+            glyphs.append(s1)
+            glyphs.append(f"{Colors.yellow}{'_' if s1 == ' ' else s1}{Colors.endc}")
+    return glyphs
 
-        for x in range(Global.SPACE_SIZE):
-            node = space.get_node(x, y)
 
-            if node.type == NodeType.unknown or (only_visible and not node.is_visible):
-                str_row.append("..")
-                continue
+_MAP_GLYPHS = _create_map_glyphs()
 
-            if node.type == NodeType.nebula:
-                s1 = "ñ" if node.relic else "n"
-            elif node.type == NodeType.asteroid:
-                s1 = "ã" if node.relic else "a"
-            else:
-                s1 = "~" if node.relic else " "
-
-            if node.reward:
-                if s1 == " ":
-                    s1 = "_"
-                s1 = f"{Colors.yellow}{s1}{Colors.endc}"
-
-            if node.coordinates in my_ships:
-                num_ships = my_ships[node.coordinates]
-                s2 = f"{Colors.blue}{ship_signs[num_ships]}{Colors.endc}"
-            elif node.coordinates in opp_ships:
-                num_ships = opp_ships[node.coordinates]
-                s2 = f"{Colors.red}{ship_signs[num_ships]}{Colors.endc}"
-            else:
-                s2 = " "
+_SHIP_SIGNS = (
+    [" "] + [str(x) for x in range(1, 10)] + ["A", "B", "C", "D", "E", "F", "H"]
+)
+
+# the index is the code from _get_ship_codes
+_SHIP_CODE_GLYPHS = (
+    [" "]
+    + [f"{Colors.blue}{x}{Colors.endc}" for x in _SHIP_SIGNS[1:]]
+    + [" "]
+    + [f"{Colors.red}{x}{Colors.endc}" for x in _SHIP_SIGNS[1:]]
+)
+_NUM_SHIP_CODES = len(_SHIP_CODE_GLYPHS)
+
+# the index is (map code + 1) * _NUM_SHIP_CODES + ship code
+_CELL_GLYPHS = [".."] * _NUM_SHIP_CODES + [
+    s1 + s2 for s1 in _MAP_GLYPHS for s2 in _SHIP_CODE_GLYPHS
+]
+
+
+def _count_ships(fleet):
+    # the number of visible ships in each node, indexed as [y, x]
+    counts = np.zeros((Global.SPACE_SIZE, Global.SPACE_SIZE), dtype=np.int16)
+    if fleet is not None:
+        positions = fleet.positions
+        np.add.at(counts, (positions[:, 1], positions[:, 0]), 1)
+    return counts
 
-            str_row.append(s1 + s2)
 
-        str_grid += " ".join([f"{y:>2}", *str_row, f"{y:>2}", "\n"])
+def _get_ship_codes(my_fleet, opp_fleet):
+    # 0 - no ships, 1...16 - the number of my ships,
+    # otherwise 17 + the number of opponent ships
+    my_ships = _count_ships(my_fleet)
+    opp_ships = _count_ships(opp_fleet)
+    opp_codes = np.where(opp_ships > 0, len(_SHIP_SIGNS) + opp_ships, 0)
+    return np.where(my_ships > 0, my_ships, opp_codes)
 
-    str_grid += line
-    log(str_grid)
 
+def _get_map_codes(space, only_visible):
+    # -1 - the node is hidden, otherwise 4 * node type + 2 * relic + reward
+    node_types = space.type_map
+    codes = 4 * node_types.astype(np.int16) + 2 * space.relic_map + space.reward_map
 
+    hidden = node_types == NodeType.unknown
+    if only_visible:
+        hidden |= ~space.visible_map
+    codes[hidden] = -1
+
+    return codes
+
+
+@debug_only
 def show_energy_field(space, only_visible=True):
-    def add_color(i):
-        color = Colors.green if i > 0 else Colors.red
-        return f"{color}{i:>3}{Colors.endc}"
+    lines = [GRID_LINE]
+    hidden = ~space.energy_known_map
+    if only_visible:
+        hidden = hidden | ~space.visible_map
 
-    line = " + " + " ".join([f"{x:>2}" for x in range(Global.SPACE_SIZE)]) + "  +\n"
-    str_grid = line
-    for y in range(Global.SPACE_SIZE):
+    for y, (energy_row, hidden_row) in enumerate(
+        zip(space.energy_map.tolist(), hidden.tolist())
+    ):
 
         str_row = []
 
-        for x in range(Global.SPACE_SIZE):
-            node = space.get_node(x, y)
-            if node.energy is None or (only_visible and not node.is_visible):
+        for energy, is_hidden in zip(energy_row, hidden_row):
+            if is_hidden:
                 str_row.append(" ..")
             else:
-                str_row.append(add_color(node.energy))
+                str_row.append(colored_int(energy))
 
-        str_grid += "".join([f"{y:>2}", *str_row, f" {y:>2}", "\n"])
+        lines.append("".join([GRID_LABELS[y], *str_row, " ", GRID_LABELS[y], "\n"]))
 
-    str_grid += line
-    log(str_grid)
+    lines.append(GRID_LINE)
+    log(*lines, sep="")
 
 
+@debug_only
 def show_exploration_map(space):
     log(
         f"all relics found: {Global.ALL_RELICS_FOUND}, "
         f"all rewards found: {Global.ALL_REWARDS_FOUND}"
     )
 
-    line = " + " + " ".join([f"{x:>2}" for x in range(Global.SPACE_SIZE)]) + "  +\n"
-    str_grid = line
-    for y in range(Global.SPACE_SIZE):
+    codes = _get_exploration_codes(space)
 
-        str_row = []
+    lines = [GRID_LINE]
+    for y, row in enumerate(codes.tolist()):
+        str_row = [_EXPLORATION_GLYPHS[code] for code in row]
+        lines.append(" ".join([GRID_LABELS[y], *str_row, GRID_LABELS[y], "\n"]))
 
-        for x in range(Global.SPACE_SIZE):
-            node = space.get_node(x, y)
-            if not node.explored_for_relic:
-                s1 = "."
-            else:
-                s1 = "R" if node.relic else " "
+    lines.append(GRID_LINE)
+    log(*lines, sep="")
 
-            if not node.explored_for_reward:
-                s2 = "."
-            else:
-                s2 = "P" if node.reward else " "
 
-            str_row.append(s1 + s2)
+def _get_exploration_codes(space):
+    # 3 * relic code + reward code, where each code is
+    # 0 - not explored, 1 - explored and not found, 2 - found
+    relic_codes = space.explored_for_relic_map * (1 + space.relic_map.astype(np.int8))
+    reward_codes = space.explored_for_reward_map * (
+        1 + space.reward_map.astype(np.int8)
+    )
+    return 3 * relic_codes + reward_codes
 
-        str_grid += " ".join([f"{y:>2}", *str_row, f"{y:>2}", "\n"])
 
-    str_grid += line
-    log(str_grid)
+_EXPLORATION_GLYPHS = [s1 + s2 for s1 in ". R" for s2 in ". P"]
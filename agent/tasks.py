@@ -2,16 +2,17 @@ from collections import defaultdict
 
 import torch
 import numpy as np
-from scipy.signal import convolve2d
 
 from .base import (
     log,
     Global,
     SPACE_SIZE,
+    box_sum,
     clip_int,
     transpose,
     get_opposite,
-    nearby_positions,
+    nearby_slice,
+    sap_hits,
     get_nebula_tile_drift_speed,
 )
 from .path import Action, ActionType, path_to_actions
@@ -105,18 +106,8 @@ def apply_nn_sap_tasks(state, previous_state, sap_model, sap_ships):
             if state.team_id == 1:
                 sap_policy = transpose(sap_policy, reflective=True)
 
-        r = Global.UNIT_SAP_RANGE * 2 + 1
-        sap_kernel = np.ones((r, r), dtype=np.float32)
-
         ship_sap_field = np.zeros((SPACE_SIZE, SPACE_SIZE), np.float32)
-        ship_sap_field[ship.node.y, ship.node.x] = 1
-        ship_sap_field = convolve2d(
-            ship_sap_field,
-            sap_kernel,
-            mode="same",
-            boundary="fill",
-            fillvalue=0,
-        )
+        ship_sap_field[nearby_slice(*ship.coordinates, Global.UNIT_SAP_RANGE)] = 1
 
         sap_policy = sap_policy * ship_sap_field
 
@@ -137,7 +128,7 @@ def apply_nn_sap_tasks(state, previous_state, sap_model, sap_ships):
 
 
 def get_sap_array(previous_state):
-    sap_array = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.float32)
+    sap_positions = []
     for unit in previous_state.fleet:
         if (
             unit.action_queue
@@ -146,13 +137,12 @@ def get_sap_array(previous_state):
             and unit.can_sap()
         ):
             action = unit.action_queue[0]
-            sap_x = unit.node.x + action.dx
-            sap_y = unit.node.y + action.dy
-            for x, y in nearby_positions(sap_x, sap_y, 1):
-                if x == sap_x and y == sap_y:
-                    sap_array[y, x] += 1
-                else:
-                    sap_array[y, x] += Global.UNIT_SAP_DROPOFF_FACTOR
+            sap_positions.append((unit.node.x + action.dx, unit.node.y + action.dy))
+
+    direct_hits, adjacent_hits = sap_hits(sap_positions)
+    sap_array = (direct_hits + adjacent_hits * Global.UNIT_SAP_DROPOFF_FACTOR).astype(
+        np.float32
+    )
 
     sap_array *= Global.UNIT_SAP_COST / Global.MAX_UNIT_ENERGY
 
@@ -163,9 +153,6 @@ def get_sap_array(previous_state):
 
 
 def create_unit_nn_input(state, previous_state):
-    r = Global.UNIT_SAP_RANGE * 2 + 1
-    sap_kernel = np.ones((r, r), dtype=np.int32)
-
     gf = np.zeros((17, 3, 3), dtype=np.float32)
 
     if (
@@ -206,29 +193,10 @@ def create_unit_nn_input(state, previous_state):
 
     d = np.zeros((28, SPACE_SIZE, SPACE_SIZE), dtype=np.float32)
 
-    for unit in state.fleet:
-        if unit.energy >= 0:
-            x, y = unit.coordinates
-            d[0, y, x] += 1
-            d[1, y, x] += unit.energy
-
-    for unit in state.opp_fleet:
-        if unit.energy >= 0:
-            x, y = unit.coordinates
-            d[2, y, x] += 1
-            d[3, y, x] += unit.energy
-
-    for unit in previous_state.fleet:
-        if unit.energy >= 0:
-            x, y = unit.coordinates
-            d[4, y, x] += 1
-            d[5, y, x] += unit.energy
-
-    for unit in previous_state.opp_fleet:
-        if unit.energy >= 0:
-            x, y = unit.coordinates
-            d[6, y, x] += 1
-            d[7, y, x] += unit.energy
+    _add_units(d[0], d[1], state.fleet)
+    _add_units(d[2], d[3], state.opp_fleet)
+    _add_units(d[4], d[5], previous_state.fleet)
+    _add_units(d[6], d[7], previous_state.opp_fleet)
 
     for i in [0, 2, 4, 6]:
         d[i] /= 10
@@ -282,13 +250,7 @@ def create_unit_nn_input(state, previous_state):
             d[26, y, x] += 1
             d[27, y, x] += 1
 
-    d[27] = convolve2d(
-        d[27],
-        sap_kernel,
-        mode="same",
-        boundary="fill",
-        fillvalue=0,
-    )
+    d[27] = box_sum(d[27], Global.UNIT_SAP_RANGE)
 
     d[24] /= 10
     d[25] /= 10
@@ -301,6 +263,15 @@ def create_unit_nn_input(state, previous_state):
     return d, gf
 
 
+def _add_units(num_units, units_energy, fleet):
+    # adds the ships with non-negative energy to the [y, x] fields
+    energies = fleet.energies
+    alive = energies >= 0
+    x, y = fleet.positions[alive].T
+    np.add.at(num_units, (y, x), 1)
+    np.add.at(units_energy, (y, x), energies[alive])
+
+
 def create_sap_nn_input(state, previous_state, sap_ship):
 
     gf = np.zeros((17, 3, 3), dtype=np.float32)
@@ -343,39 +314,26 @@ def create_sap_nn_input(state, previous_state, sap_ship):
 
     d = np.zeros((29, SPACE_SIZE, SPACE_SIZE), dtype=np.float32)
 
-    r = Global.UNIT_SAP_RANGE * 2 + 1
-    sap_kernel = np.ones((r, r), dtype=np.int32)
-    ship_arr = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.int32)
-    ship_arr[sap_ship.node.y, sap_ship.node.x] = 1
-    ship_arr = convolve2d(
-        ship_arr,
-        sap_kernel,
-        mode="same",
-        boundary="fill",
-        fillvalue=0,
-    )
-
-    d[0] = ship_arr
+    # 0 - unit sap range
+    d[0][nearby_slice(*sap_ship.coordinates, Global.UNIT_SAP_RANGE)] = 1
 
     unit_sap_dropoff_factor = (
         Global.UNIT_SAP_DROPOFF_FACTOR if Global.UNIT_SAP_DROPOFF_FACTOR_FOUND else 0.5
     )
 
-    other_saps = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.float16)
+    sap_positions = []
     for unit in state.fleet:
         if unit.energy >= 0:
             x, y = unit.coordinates
 
             if unit.action_queue and unit.action_queue[0].type == ActionType.sap:
                 action = unit.action_queue[0]
-                dx, dy = action.dx, action.dy
-                sap_x, sap_y = x + dx, y + dy
+                sap_positions.append((x + action.dx, y + action.dy))
 
-                for x, y in nearby_positions(sap_x, sap_y, 1):
-                    if x == sap_x and y == sap_y:
-                        other_saps[y, x] += 1
-                    else:
-                        other_saps[y, x] += unit_sap_dropoff_factor
+    direct_hits, adjacent_hits = sap_hits(sap_positions)
+    other_saps = (direct_hits + adjacent_hits * unit_sap_dropoff_factor).astype(
+        np.float16
+    )
 
     other_saps *= Global.UNIT_SAP_COST / Global.MAX_UNIT_ENERGY
 
@@ -383,22 +341,14 @@ def create_sap_nn_input(state, previous_state, sap_ship):
 
     # 2 - num units
     # 3 - unit energy
-    for unit in state.fleet:
-        if unit.energy >= 0:
-            x, y = unit.coordinates
-            d[2, y, x] += 1
-            d[3, y, x] += unit.energy
+    _add_units(d[2], d[3], state.fleet)
 
     d[2] /= 10
     d[3] /= Global.MAX_UNIT_ENERGY
 
     # 4 - opp unit position
     # 5 - opp unit energy
-    for unit in state.opp_fleet:
-        if unit.energy >= 0:
-            x, y = unit.coordinates
-            d[4, y, x] += 1
-            d[5, y, x] += unit.energy
+    _add_units(d[4], d[5], state.opp_fleet)
 
     d[4] /= 10
     d[5] /= Global.MAX_UNIT_ENERGY
@@ -435,22 +385,14 @@ def create_sap_nn_input(state, previous_state, sap_ship):
 
     # 8 - previous step unit positions
     # 9 - previous step unit energy
-    for unit in previous_state.fleet:
-        if unit.energy >= 0:
-            x, y = unit.coordinates
-            d[8, y, x] += 1
-            d[9, y, x] += unit.energy
+    _add_units(d[8], d[9], previous_state.fleet)
 
     d[8] /= 10
     d[9] /= Global.MAX_UNIT_ENERGY
 
     # 10 - previous step opp unit positions
     # 11 - previous step opp unit energy
-    for unit in previous_state.opp_fleet:
-        if unit.energy >= 0:
-            x, y = unit.coordinates
-            d[10, y, x] += 1
-            d[11, y, x] += unit.energy
+    _add_units(d[10], d[11], previous_state.opp_fleet)
 
     d[10] /= 10
     d[11] /= Global.MAX_UNIT_ENERGY
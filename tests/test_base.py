@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from scipy.signal import convolve2d
+
+from agent.base import SPACE_SIZE, box_sum, pyramid_sum, sap_hits
+
+RADII = [0, 1, 2, 3, 4]
+
+EDGE_POSITIONS = [
+    (0, 0),
+    (SPACE_SIZE - 1, 0),
+    (0, SPACE_SIZE - 1),
+    (SPACE_SIZE - 1, SPACE_SIZE - 1),
+    (0, 10),
+    (10, 0),
+    (SPACE_SIZE - 1, 7),
+    (7, SPACE_SIZE - 1),
+]
+
+
+def create_fields():
+    # units on the corners and the edges of the map, and a few random maps
+    rng = np.random.default_rng(0)
+
+    edges = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.int32)
+    for x, y in EDGE_POSITIONS:
+        edges[y, x] += 1
+
+    yield edges
+    yield edges.astype(bool)
+    yield rng.integers(0, 3, size=(SPACE_SIZE, SPACE_SIZE)).astype(np.int32)
+    yield rng.random((SPACE_SIZE, SPACE_SIZE)) < 0.1
+    yield rng.random((SPACE_SIZE, SPACE_SIZE)).astype(np.float32)
+
+
+def convolve(arr, kernel):
+    if arr.dtype == bool:
+        arr = arr.astype(np.int32)
+    return convolve2d(arr, kernel, mode="same", boundary="fill", fillvalue=0)
+
+
+def pyramid_kernel(radius):
+    d = np.abs(np.arange(-radius, radius + 1))
+    return radius + 1 - np.maximum(d[:, None], d[None, :])
+
+
+def assert_same(result, expected):
+    if np.issubdtype(result.dtype, np.floating):
+        np.testing.assert_allclose(result, expected, rtol=1e-5, atol=1e-4)
+    else:
+        np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("radius", RADII)
+def test_box_sum(radius):
+    kernel = np.ones((2 * radius + 1, 2 * radius + 1), dtype=np.int32)
+    for arr in create_fields():
+        assert_same(box_sum(arr, radius), convolve(arr, kernel))
+
+
+@pytest.mark.parametrize("radius", RADII)
+def test_pyramid_sum(radius):
+    kernel = pyramid_kernel(radius)
+    for arr in create_fields():
+        assert_same(pyramid_sum(arr, radius), convolve(arr, kernel))
+
+
+def reference_sap_hits(sap_positions):
+    # the per-node loop, which was used before sap_hits
+    direct_hits = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.int16)
+    adjacent_hits = np.zeros((SPACE_SIZE, SPACE_SIZE), dtype=np.int16)
+    for sap_x, sap_y in sap_positions:
+        for x in range(max(0, sap_x - 1), min(SPACE_SIZE, sap_x + 2)):
+            for y in range(max(0, sap_y - 1), min(SPACE_SIZE, sap_y + 2)):
+                if x == sap_x and y == sap_y:
+                    direct_hits[y, x] += 1
+                else:
+                    adjacent_hits[y, x] += 1
+    return direct_hits, adjacent_hits
+
+
+def test_sap_hits():
+    rng = np.random.default_rng(0)
+
+    # the sap target can be outside the map, next to the unit on the edge
+    outside_positions = [(-1, -1), (-1, 5), (SPACE_SIZE, 3), (4, SPACE_SIZE)]
+    cases = [
+        [],
+        EDGE_POSITIONS,
+        outside_positions,
+        EDGE_POSITIONS + EDGE_POSITIONS + outside_positions,
+    ]
+    for _ in range(20):
+        positions = rng.integers(-2, SPACE_SIZE + 2, size=(16, 2))
+        cases.append([(int(x), int(y)) for x, y in positions])
+
+    for sap_positions in cases:
+        direct_hits, adjacent_hits = sap_hits(sap_positions)
+        expected_direct_hits, expected_adjacent_hits = reference_sap_hits(sap_positions)
+        np.testing.assert_array_equal(direct_hits, expected_direct_hits)
+        np.testing.assert_array_equal(adjacent_hits, expected_adjacent_hits)
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from agent.base import Global, elements_moving
+from agent.space import _get_obstacle_movement_period
+
+PERIOD_OPTIONS = [20 / 3, 10, 20, 40]
+
+
+@pytest.fixture(autouse=True)
+def period_options():
+    Global.OBSTACLE_MOVEMENT_PERIOD_OPTIONS = list(PERIOD_OPTIONS)
+    yield
+    Global.OBSTACLE_MOVEMENT_PERIOD_OPTIONS = list(PERIOD_OPTIONS)
+
+
+def movement_history(period, num_steps):
+    # the status log of the obstacles, which move with the given period
+    history = np.array(
+        [elements_moving(i + 1, period) for i in range(num_steps)], dtype=np.int8
+    )
+    history[0] = 0
+    return history
+
+
+def reference_period_options(obstacles_movement_status):
+    # the per-step loop, which was used before the movement schedules
+    suitable_periods = []
+    for period in PERIOD_OPTIONS:
+        moving_pattern = [
+            elements_moving(i + 1, period)
+            for i in range(len(obstacles_movement_status))
+        ]
+        moving_pattern[0] = False
+
+        obs_num_movements = 0
+        pattern_num_movements = 0
+        is_suitable = True
+        for pattern_flag, obs_flag in zip(moving_pattern, obstacles_movement_status):
+            if pattern_flag and obs_flag == 0:
+                is_suitable = False
+                break
+            obs_num_movements += obs_flag == 1
+            pattern_num_movements += bool(pattern_flag)
+
+        if is_suitable and obs_num_movements <= pattern_num_movements:
+            suitable_periods.append(period)
+
+    return suitable_periods
+
+
+@pytest.mark.parametrize("period", [20, 40])
+def test_period_found(period):
+    history = movement_history(period, 200)
+    assert _get_obstacle_movement_period(history) == period
+    assert Global.OBSTACLE_MOVEMENT_PERIOD_OPTIONS == [period]
+
+
+def test_period_with_unknown_steps():
+    history = movement_history(20, 200)
+    history[::3] = -1
+    assert _get_obstacle_movement_period(history) == 20
+
+
+def test_short_history():
+    history = movement_history(20, 4)
+    assert _get_obstacle_movement_period(history) is None
+    assert Global.OBSTACLE_MOVEMENT_PERIOD_OPTIONS == PERIOD_OPTIONS
+
+
+def test_only_unknown_steps():
+    history = np.full(200, -1, dtype=np.int8)
+    assert _get_obstacle_movement_period(history) is None
+    assert Global.OBSTACLE_MOVEMENT_PERIOD_OPTIONS == PERIOD_OPTIONS
+
+
+def test_contradictory_history():
+    # the obstacles can't move at every step
+    history = np.ones(200, dtype=np.int8)
+    assert _get_obstacle_movement_period(history) is None
+    assert Global.OBSTACLE_MOVEMENT_PERIOD_OPTIONS == []
+
+
+def test_matches_reference():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        num_steps = int(rng.integers(5, 505))
+        period = PERIOD_OPTIONS[rng.integers(len(PERIOD_OPTIONS))]
+        history = movement_history(period, num_steps)
+        unknown = rng.random(num_steps) < rng.random()
+        history[unknown] = -1
+        if rng.random() < 0.3:
+            history = rng.integers(-1, 2, size=num_steps).astype(np.int8)
+
+        Global.OBSTACLE_MOVEMENT_PERIOD_OPTIONS = list(PERIOD_OPTIONS)
+        _get_obstacle_movement_period(history)
+        assert Global.OBSTACLE_MOVEMENT_PERIOD_OPTIONS == reference_period_options(
+            history
+        )